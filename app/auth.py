@@ -1,18 +1,26 @@
-from datetime import datetime, timedelta
-from typing import Optional, Union
-from jose import JWTError, jwt
+from datetime import timedelta, timezone
+from typing import Optional, Tuple, Union
+import jwt
 # from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from .config import settings
 from .database import get_db
-from . import models, schemas
-from .utils import hash_api_key
+from .password_pool import run_in_password_pool
+from . import cache, models, schemas
+from .utils import generate_refresh_token_str, hash_api_key, validate_password
 
+import base64
 import bcrypt
+import hashlib
+import hmac
+import orjson
 import secrets
+import statistics
+import time
+from cachetools import TTLCache
 
 # pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -20,6 +28,40 @@ import secrets
 jwt_bearer = HTTPBearer(scheme_name="JWTBearer")
 api_key_bearer = HTTPBearer(scheme_name="APIKeyBearer")
 
+# JWT settings resolved once at import instead of on every request
+_SECRET = settings.SECRET_KEY.encode()
+_ALGS = (settings.ALGORITHM,)
+_ACCESS_TTL = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+# HMAC-signed tokens are built directly: the header never changes and the
+# keyed HMAC state is prepared once, so each token costs one copy + update.
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+_JWT_HEADER_B64 = _b64url(orjson.dumps({"alg": _ALGS[0], "typ": "JWT"}))
+_JWT_HMAC = (
+    hmac.new(_SECRET, digestmod=_HMAC_DIGESTS[_ALGS[0]])
+    if _ALGS[0] in _HMAC_DIGESTS else None
+)
+
+# Hot-path statements built once; only the bound values change per request
+_STMT_USER_BY_EMAIL = select(models.User).where(models.User.email == bindparam("email"))
+_STMT_ACTIVE_API_KEY_WITH_USER = (
+    select(models.APIKey, models.User)
+    .join(models.User, models.APIKey.user_id == models.User.id)
+    .where(
+        models.APIKey.key == bindparam("key_hash"),
+        models.APIKey.is_active == True
+    )
+)
+
+# Short-lived cache of verified access tokens: token digest -> (user_id, exp)
+_token_cache: TTLCache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # return pwd_context.verify(plain_password, hashed_password)
     # Ensure bytes for bcrypt
@@ -33,33 +75,95 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     # return pwd_context.hash(password)
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(pwd_bytes, salt)
     return hashed.decode('utf-8')
 
+# Checked against when the email is unknown, so every failed login costs one bcrypt verify
+_DUMMY_HASH = get_password_hash(secrets.token_urlsafe(16))
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    # bcrypt hashes carry their algorithm and cost: $2b$<rounds>$<salt+hash>
+    parts = hashed_password.split("$")
+    if len(parts) != 4 or parts[1] != "2b":
+        return True
+    # Only upgrade: hosts calibrated to different costs must not keep rehashing
+    return int(parts[2]) < settings.BCRYPT_ROUNDS
+
+def calibrate_bcrypt_rounds(target_ms: int, min_rounds: Optional[int] = None, max_rounds: int = 15) -> int:
+    """
+    Return the highest bcrypt cost whose median hash time (3 runs) stays
+    within target_ms on this machine, never going below min_rounds.
+    
+    min_rounds defaults to the configured BCRYPT_ROUNDS: stored hashes are
+    never downgraded, so a lower cost would make the unknown-email dummy
+    check faster than verifying a real user and reopen the timing gap.
+    """
+    if min_rounds is None:
+        min_rounds = settings.BCRYPT_ROUNDS
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter_ns()
+            bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds))
+            timings.append(time.perf_counter_ns() - start)
+        if statistics.median(timings) / 1_000_000 > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+def set_bcrypt_rounds(rounds: int):
+    """Use a new bcrypt cost for new hashes and for the unknown-user dummy check."""
+    global _DUMMY_HASH
+    settings.BCRYPT_ROUNDS = rounds
+    _DUMMY_HASH = get_password_hash(secrets.token_urlsafe(16))
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    # bcrypt is CPU-bound; run it off the event loop
+    return await run_in_password_pool(verify_password, plain_password, hashed_password)
+
+async def aget_password_hash(password: str) -> str:
+    return await run_in_password_pool(get_password_hash, password)
+
+def _validate_and_hash(password: str) -> Tuple[Optional[str], Optional[str]]:
+    error = validate_password(password)
+    if error:
+        return None, error
+    return get_password_hash(password), None
+
+async def avalidate_and_hash_password(password: str) -> Tuple[Optional[str], Optional[str]]:
+    # Policy check and bcrypt in one pool submission; returns (hash, None) or (None, error)
+    return await run_in_password_pool(_validate_and_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    to_encode["exp"] = int(time.time() + (expires_delta or _ACCESS_TTL).total_seconds())
+    if _JWT_HMAC is None:
+        return jwt.encode(to_encode, _SECRET, algorithm=_ALGS[0])
+    
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(orjson.dumps(to_encode))
+    mac = _JWT_HMAC.copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode("ascii")
 
 from uuid import UUID
 
 def create_refresh_token(user_id: UUID) -> str:
-    timestamp = datetime.utcnow().isoformat()
-    return f"rt_{secrets.token_urlsafe(32)}_{timestamp}"
+    return generate_refresh_token_str()
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    result = await db.execute(_STMT_USER_BY_EMAIL, {"email": email})
+    return result.scalar_one_or_none()
 
 async def authenticate_user(db: AsyncSession, email: str, password: str):
-    result = await db.execute(select(models.User).filter(models.User.email == email))
-    user = result.scalar_one_or_none()
-    if not user:
-        return False
-    if not verify_password(password, user.hashed_password):
+    user = await get_user_by_email(db, email)
+    password_ok = await averify_password(password, user.hashed_password if user else _DUMMY_HASH)
+    if user is None or not password_ok:
         return False
+    # Upgrade hashes created with a different cost; persisted by the caller's commit
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await aget_password_hash(password)
     return user
 
 async def get_current_user_from_token(
@@ -73,20 +177,30 @@ async def get_current_user_from_token(
     )
     
     token = credentials.credentials
+    cache_key = _token_cache_key(token)
+    
+    cached = _token_cache.get(cache_key)
+    if cached is not None and cached[1] > time.time():
+        user = await db.get(models.User, cached[0])
+        if user is None:
+            _token_cache.pop(cache_key, None)
+            raise credentials_exception
+        return user
     
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, _SECRET, algorithms=_ALGS)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-    except JWTError:
+    except jwt.InvalidTokenError:
         raise credentials_exception
     
-    result = await db.execute(select(models.User).filter(models.User.email == email))
-    user = result.scalar_one_or_none()
+    user = await get_user_by_email(db, email)
     if user is None:
         raise credentials_exception
     
+    _token_cache[cache_key] = (user.id, payload["exp"])
+    
     return user
 
 async def get_current_user_from_api_key(
@@ -105,29 +219,44 @@ async def get_current_user_from_api_key(
     if not api_key_value.startswith('sk_'):
         raise credentials_exception
     
-    result = await db.execute(
-        select(models.APIKey).filter(
-            models.APIKey.key == hash_api_key(api_key_value),
-            models.APIKey.is_active == True
-        )
-    )
-    key_record = result.scalar_one_or_none()
+    key_hash = hash_api_key(api_key_value)
+    key_data = await cache.get_api_key(key_hash)
     
-    if not key_record:
-        raise credentials_exception
+    if key_data is None:
+        # Fetch the key and its owner in a single round-trip
+        result = await db.execute(_STMT_ACTIVE_API_KEY_WITH_USER, {"key_hash": key_hash})
+        row = result.one_or_none()
+        
+        if not row:
+            raise credentials_exception
+        key_record, user = row
+        
+        key_data = {
+            "user_id": user.id,
+            "email": user.email,
+            "user_is_active": user.is_active,
+            "created_at": user.created_at,
+            "is_active": key_record.is_active,
+            "expires_at": key_record.expires_at.replace(tzinfo=timezone.utc).timestamp() if key_record.expires_at else None,
+        }
+        await cache.set_api_key(key_hash, key_data)
+    else:
+        # Cache hit: rebuild the owner from cached fields instead of querying.
+        # The object is not attached to the session; routes only read it.
+        user = models.User(
+            id=key_data["user_id"],
+            email=key_data["email"],
+            is_active=key_data["user_is_active"],
+            created_at=key_data["created_at"]
+        )
     
     # Check if expired
-    if key_record.expires_at and key_record.expires_at < datetime.utcnow():
+    if key_data["expires_at"] and key_data["expires_at"] < time.time():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="API key has expired"
         )
     
-    result = await db.execute(select(models.User).filter(models.User.id == key_record.user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise credentials_exception
-    
     return user
 
 async def get_current_user(
@@ -164,11 +293,16 @@ async def get_current_user(
 
 
 
-def require_service_access(current_user_data: tuple = Depends(get_current_user)):
+def require_service_access(current_user_data: tuple = Depends(get_current_user)) -> tuple[models.User, str]:
+    """
+    Returns (user, auth_type) from get_current_user after checking the
+    request used an API key. Routes should depend on this alone rather than
+    listing get_current_user as well.
+    """
     user, auth_type = current_user_data
     if auth_type != "api_key":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Service access required (API Key)"
         )
-    return user
\ No newline at end of file
+    return current_user_data
\ No newline at end of file
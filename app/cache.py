@@ -0,0 +1,86 @@
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from cachetools import TTLCache
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from .config import settings
+from .logging_config import logger
+
+# Cached API key metadata lives for a minute; revocation invalidates it eagerly
+API_KEY_CACHE_TTL = 60
+# Revocation leaves a tombstone instead of deleting the entry, so a lookup
+# that read the key row before the revoke committed cannot re-cache it.
+API_KEY_TOMBSTONE_TTL = 30
+_TOMBSTONE = b"revoked"
+# Optional per-process layer in front of Redis. A revocation in another
+# worker cannot clear it, so this process may accept the key until expiry.
+_local_cache: Optional[TTLCache] = (
+    TTLCache(maxsize=1024, ttl=settings.API_KEY_LOCAL_CACHE_TTL_SECONDS)
+    if settings.API_KEY_LOCAL_CACHE_TTL_SECONDS else None
+)
+
+redis_client = aioredis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+
+def _api_key_cache_key(key_hash: bytes) -> str:
+    return f"token:{key_hash.hex()}"
+
+async def get_api_key(key_hash: bytes) -> Optional[dict]:
+    """
+    Return cached metadata for an API key hash, or None on miss. Besides the
+    key's is_active/expires_at it holds the owner's user_id, email,
+    user_is_active and created_at, so a hit needs no database query.
+    """
+    if _local_cache is not None:
+        data = _local_cache.get(key_hash)
+        if data is not None:
+            return data
+    if redis_client is None:
+        return None
+    try:
+        raw = await redis_client.get(_api_key_cache_key(key_hash))
+    except RedisError:
+        logger.warning("Redis unavailable, skipping API key cache read")
+        return None
+    if raw is None or raw == _TOMBSTONE:
+        return None
+
+    data = json.loads(raw)
+    data["user_id"] = UUID(data["user_id"])
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    if _local_cache is not None:
+        _local_cache[key_hash] = data
+    return data
+
+async def set_api_key(key_hash: bytes, data: dict):
+    """Cache API key metadata after a database lookup. expires_at is a Unix timestamp."""
+    if _local_cache is not None:
+        _local_cache[key_hash] = data
+    if redis_client is None:
+        return
+    value = json.dumps({
+        **data,
+        "user_id": str(data["user_id"]),
+        "created_at": data["created_at"].isoformat(),
+    })
+    try:
+        # NX: never overwrite a revocation tombstone
+        await redis_client.set(_api_key_cache_key(key_hash), value, ex=API_KEY_CACHE_TTL, nx=True)
+    except RedisError:
+        logger.warning("Redis unavailable, skipping API key cache write")
+
+async def invalidate_api_key(key_hash: bytes):
+    """Drop a cached API key, e.g. after it has been revoked."""
+    if _local_cache is not None:
+        _local_cache.pop(key_hash, None)
+    if redis_client is None:
+        return
+    try:
+        await redis_client.set(_api_key_cache_key(key_hash), _TOMBSTONE, ex=API_KEY_TOMBSTONE_TTL)
+    except RedisError:
+        logger.warning("Redis unavailable, could not invalidate cached API key")
+
+async def close():
+    if redis_client is not None:
+        await redis_client.aclose()
@@ -1,13 +1,20 @@
-from pydantic_settings import BaseSettings
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    BCRYPT_ROUNDS: int = 12  # bcrypt work factor (2^rounds iterations)
+    BCRYPT_TARGET_MS: int = 0  # Opt-in: raise BCRYPT_ROUNDS at startup up to this hash time; 0 disables
+    TOKEN_CACHE_SIZE: int = 10_000  # Verified access tokens kept in memory per process
+    TOKEN_CACHE_TTL_SECONDS: int = 5  # How long a verified token skips signature checks
+    API_KEY_LOCAL_CACHE_TTL_SECONDS: int = 0  # >0 caches API key lookups per process for this many seconds
+    REDIS_URL: Optional[str] = None  # Shared rate limits and API key lookup cache
+    RATE_LIMIT_FLUSH_MS: int = 0  # >0 batches Redis rate-limit updates at this interval (fixed window)
     TESTING: bool = False  # Set to True to disable rate limiting
-    
-    class Config:
-        env_file = ".env"
+
+    model_config = SettingsConfigDict(env_file=".env")
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,172 @@
+import threading
+import time
+from typing import Optional
+import redis
+from limits.storage import Storage
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from .config import settings
+from .logging_config import logger
+
+# INCRBY the coalesced delta, start the window's TTL on first write, and
+# return the shared count together with the remaining TTL.
+_INCR_SCRIPT = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+if count == tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return {count, redis.call('TTL', KEYS[1])}
+"""
+
+class CoalescedRedisStorage(Storage):
+    """
+    Fixed-window rate-limit counters that are shared through Redis without a
+    Redis round-trip per request.
+
+    incr() answers from per-process pending deltas plus the last count seen in
+    Redis. A background thread flushes all pending deltas in one pipelined
+    round-trip every flush_interval seconds, so limits are enforced across
+    workers with at most one interval of lag.
+    """
+
+    STORAGE_SCHEME = ["coalesced+redis", "coalesced+rediss", "coalesced+unix"]
+
+    def __init__(
+        self,
+        uri: str,
+        wrap_exceptions: bool = False,
+        flush_interval: float = 0.02,
+        key_prefix: str = "LIMITS",
+        **options
+    ):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._client = redis.Redis.from_url(uri.replace("coalesced+", "", 1), **options)
+        # Same namespace as limits' RedisStorage so reset() only touches our keys
+        self._prefix = f"{key_prefix}:"
+        self._incr = self._client.register_script(_INCR_SCRIPT)
+        self._flush_interval = flush_interval
+        self._redis_ok = True
+        self._lock = threading.Lock()
+        self._pending: dict[str, list] = {}  # key -> [delta, expiry]
+        self._remote: dict[str, tuple[int, float]] = {}  # key -> (count, window end)
+        threading.Thread(target=self._flush_loop, name="ratelimit-flush", daemon=True).start()
+
+    @property
+    def base_exceptions(self):
+        return redis.RedisError
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        if key not in self._remote:
+            self._prime(key)
+        now = time.time()
+        with self._lock:
+            count, window_end = self._remote.get(key, (0, 0.0))
+            if window_end <= now:
+                count = 0
+                self._remote[key] = (0, now + expiry)
+            pending = self._pending.setdefault(key, [0, expiry])
+            pending[0] += amount
+            return count + pending[0]
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            count, window_end = self._remote.get(key, (0, 0.0))
+            if window_end <= time.time():
+                count = 0
+            pending = self._pending.get(key)
+            return count + (pending[0] if pending else 0)
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            return self._remote.get(key, (0, time.time()))[1]
+
+    def check(self) -> bool:
+        return self._client.ping()
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            self._pending.clear()
+            self._remote.clear()
+        try:
+            keys = list(self._client.scan_iter(match=f"{self._prefix}*", count=1000))
+            return self._client.delete(*keys) if keys else 0
+        except redis.RedisError:
+            logger.warning("Redis unavailable, rate limits were only reset in this process")
+            return None
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+            self._remote.pop(key, None)
+        try:
+            self._client.delete(self._prefix + key)
+        except redis.RedisError:
+            logger.warning("Redis unavailable, rate limit was only cleared in this process")
+
+    def _prime(self, key: str):
+        # First time this process sees a key: read the shared count once so
+        # other workers' hits in the current window are not ignored.
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.get(self._prefix + key)
+            pipe.ttl(self._prefix + key)
+            count, ttl = pipe.execute()
+        except redis.RedisError:
+            return
+        if count is not None and ttl > 0:
+            with self._lock:
+                self._remote.setdefault(key, (int(count), time.time() + ttl))
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self._flush_interval)
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key, (delta, expiry) in pending.items():
+                self._incr(keys=[self._prefix + key], args=[delta, expiry], client=pipe)
+            results = pipe.execute()
+        except redis.RedisError:
+            if self._redis_ok:
+                logger.warning("Redis unavailable, keeping rate-limit deltas for the next flush")
+            self._redis_ok = False
+            with self._lock:
+                for key, (delta, expiry) in pending.items():
+                    self._pending.setdefault(key, [0, expiry])[0] += delta
+            return
+
+        self._redis_ok = True
+        now = time.time()
+        with self._lock:
+            for key, (count, ttl) in zip(pending, results):
+                self._remote[key] = (count, now + max(ttl, 0))
+            # Forget windows that have ended so idle clients do not accumulate
+            for key in [k for k, (_, end) in self._remote.items() if end <= now and k not in self._pending]:
+                del self._remote[key]
+
+def storage_config() -> dict:
+    """Limiter keyword arguments selecting the rate-limit storage and strategy."""
+    if not settings.REDIS_URL:
+        return {"storage_uri": "memory://", "strategy": "moving-window"}
+    if settings.RATE_LIMIT_FLUSH_MS:
+        return {
+            "storage_uri": f"coalesced+{settings.REDIS_URL}",
+            "storage_options": {"flush_interval": settings.RATE_LIMIT_FLUSH_MS / 1000},
+            "strategy": "fixed-window",
+        }
+    return {"storage_uri": settings.REDIS_URL, "strategy": "moving-window"}
+
+# Shared by the app and every router so all limits use one storage client
+limiter = Limiter(
+    key_func=get_remote_address,
+    **storage_config(),
+    in_memory_fallback_enabled=True,
+    enabled=not settings.TESTING
+)
@@ -1,12 +1,15 @@
 import logging
+import logging.handlers
+import queue
 import sys
-import json
+import orjson
 from datetime import datetime
 
 class JsonFormatter(logging.Formatter):
     def format(self, record):
         log_record = {
-            "timestamp": datetime.utcnow().isoformat(),
+            # record.created is captured when the record is made; no extra clock read
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
             "level": record.levelname,
             "message": record.getMessage(),
             "module": record.module,
@@ -14,16 +17,24 @@ class JsonFormatter(logging.Formatter):
         }
         if record.exc_info:
             log_record["exception"] = self.formatException(record.exc_info)
-        return json.dumps(log_record)
+        return orjson.dumps(log_record).decode()
 
 def setup_logging():
     logger = logging.getLogger("auth_system")
     logger.setLevel(logging.INFO)
     
     handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(JsonFormatter())
+    handler.setFormatter(logging.Formatter("%(message)s"))
     
-    logger.addHandler(handler)
-    return logger
+    # Request handlers only enqueue records; a background thread does the
+    # (potentially blocking) stdout writes.
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(JsonFormatter())
+    logger.addHandler(queue_handler)
+    
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return logger, listener
 
-logger = setup_logging()
+logger, log_listener = setup_logging()
@@ -1,24 +1,34 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from .config import settings
 from .database import init_db
+from .limiter import limiter
+from . import cache, password_pool, schemas
+from .auth import calibrate_bcrypt_rounds, set_bcrypt_rounds
 from .routers import auth, keys, protected
-from .logging_config import logger
-
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address)
+from .logging_config import logger, log_listener
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Create database tables
     logger.info("Starting up application and initializing database...")
     await init_db()
+    if settings.BCRYPT_TARGET_MS:
+        # Only ever raise the cost: existing hashes keep theirs and the dummy check must match
+        rounds = await password_pool.run_in_password_pool(
+            calibrate_bcrypt_rounds, settings.BCRYPT_TARGET_MS, min_rounds=settings.BCRYPT_ROUNDS
+        )
+        await password_pool.run_in_password_pool(set_bcrypt_rounds, rounds)
+        logger.info(f"Calibrated bcrypt cost to {rounds} rounds (target {settings.BCRYPT_TARGET_MS}ms)")
     yield
     # Shutdown
     logger.info("Shutting down application...")
+    await cache.close()
+    password_pool.shutdown()
+    log_listener.stop()
 
 app = FastAPI(
     title="Authentication & API Key System",
@@ -62,7 +72,7 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
-# Add limiter to app so routers can use it
+# Register the shared limiter and its 429 handler
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -88,7 +98,7 @@ app.include_router(auth.router)
 app.include_router(keys.router)
 app.include_router(protected.router)
 
-@app.get("/")
+@app.get("/", response_model=schemas.RootResponse)
 def root():
     return {
         "message": "Authentication & API Key System API",
@@ -101,6 +111,6 @@ def root():
         }
     }
 
-@app.get("/health")
+@app.get("/health", response_model=schemas.HealthResponse)
 def health_check():
     return {"status": "healthy"}
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Uuid
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, LargeBinary, Uuid, text
 import uuid
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,7 +7,7 @@ from .database import Base
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
@@ -19,23 +19,35 @@ class User(Base):
 class APIKey(Base):
     __tablename__ = "api_keys"
     
-    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
-    key = Column(String, unique=True, index=True, nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    key = Column(LargeBinary(32), unique=True, nullable=False)  # SHA-256 digest
     name = Column(String, nullable=True)
-    user_id = Column(Uuid, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
     is_active = Column(Boolean, default=True)
     expires_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     revoked_at = Column(DateTime, nullable=True)
     
     user = relationship("User", back_populates="api_keys")
+    
+    __table_args__ = (
+        # Authentication only ever looks up active keys
+        Index("ix_apikey_active", "key", postgresql_where=text("is_active")),
+        # Covers /keys/list as an index-only scan
+        Index(
+            "ix_apikeys_user_active",
+            "user_id",
+            "is_active",
+            postgresql_include=["id", "name", "expires_at", "created_at", "revoked_at"],
+        ),
+    )
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
     
-    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
-    token = Column(String, unique=True, index=True, nullable=False)
-    user_id = Column(Uuid, ForeignKey("users.id"), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    token = Column(LargeBinary(32), unique=True, index=True, nullable=False)  # SHA-256 digest
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     revoked_at = Column(DateTime, nullable=True)
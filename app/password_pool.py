@@ -0,0 +1,17 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# bcrypt releases the GIL while hashing, so threads run in parallel across
+# cores. Sizing the pool to the CPU count bounds concurrent hashing and keeps
+# password work out of the shared threadpool used for other sync calls.
+_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
+
+async def run_in_password_pool(func, *args, **kwargs):
+    """Run a CPU-bound password function on the dedicated bcrypt pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool, partial(func, *args, **kwargs))
+
+def shutdown():
+    _pool.shutdown(wait=False, cancel_futures=True)
@@ -1,16 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from datetime import datetime, timedelta
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from .. import models, schemas, auth
 from ..database import get_db
-from ..config import settings
-from ..utils import validate_password
+from ..limiter import limiter
+from ..utils import hash_refresh_token
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
-limiter = Limiter(key_func=get_remote_address, enabled=not settings.TESTING)
+REFRESH_TOKEN_TTL = timedelta(days=7)
 
 @router.post("/signup", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/hour")
@@ -18,17 +16,8 @@ async def signup(request: Request, user: schemas.UserCreate, db: AsyncSession =
     """
     Register a new user
     """
-    # Validate password policy
-    password_error = validate_password(user.password)
-    if password_error:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=password_error
-        )
-    
     # Check if user already exists
-    result = await db.execute(select(models.User).filter(models.User.email == user.email))
-    db_user = result.scalar_one_or_none()
+    db_user = await auth.get_user_by_email(db, user.email)
     
     if db_user:
         raise HTTPException(
@@ -36,16 +25,23 @@ async def signup(request: Request, user: schemas.UserCreate, db: AsyncSession =
             detail="Email already registered"
         )
     
+    # Validate password policy and hash it in a single trip to the bcrypt pool
+    hashed_password, password_error = await auth.avalidate_and_hash_password(user.password)
+    if password_error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=password_error
+        )
+    
     # Create new user
-    hashed_password = auth.get_password_hash(user.password)
-    new_user = models.User(
-        email=user.email,
-        hashed_password=hashed_password
+    # INSERT ... RETURNING gives us server-side defaults without a follow-up SELECT
+    result = await db.execute(
+        insert(models.User)
+        .values(email=user.email, hashed_password=hashed_password)
+        .returning(models.User)
     )
-    
-    db.add(new_user)
+    new_user = schemas.UserResponse.model_validate(result.scalar_one())
     await db.commit()
-    await db.refresh(new_user)
     
     return new_user
 
@@ -65,17 +61,14 @@ async def login(request: Request, user_credentials: schemas.UserLogin, db: Async
         )
     
     # Access Token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = auth.create_access_token(data={"sub": user.email})
     
     # Refresh Token
     refresh_token = auth.create_refresh_token(user.id)
     new_refresh_token = models.RefreshToken(
-        token=refresh_token,
+        token=hash_refresh_token(refresh_token),
         user_id=user.id,
-        expires_at=datetime.utcnow() + timedelta(days=7) # 7 days validity
+        expires_at=datetime.utcnow() + REFRESH_TOKEN_TTL
     )
     db.add(new_refresh_token)
     await db.commit()
@@ -96,37 +89,36 @@ async def refresh_token(
     """
     Get new access token using refresh token
     """
-    # Find active refresh token
+    # One timestamp for the whole rotation
+    now = datetime.utcnow()
+    
+    # Find active refresh token together with its user
     result = await db.execute(
-        select(models.RefreshToken).filter(
-            models.RefreshToken.token == refresh_token,
+        select(models.RefreshToken, models.User)
+        .join(models.User, models.User.id == models.RefreshToken.user_id)
+        .filter(
+            models.RefreshToken.token == hash_refresh_token(refresh_token),
             models.RefreshToken.revoked_at == None,
-            models.RefreshToken.expires_at > datetime.utcnow()
+            models.RefreshToken.expires_at > now
         )
     )
-    token_record = result.scalar_one_or_none()
+    row = result.one_or_none()
     
-    if not token_record:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired refresh token"
         )
-        
-    # Get user
-    result = await db.execute(select(models.User).filter(models.User.id == token_record.user_id))
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    token_record, user = row
 
     # Rotate refresh token (optional security best practice: revoke old, issue new)
-    token_record.revoked_at = datetime.utcnow()
+    token_record.revoked_at = now
     
     new_refresh_token_val = auth.create_refresh_token(user.id)
     new_refresh_token = models.RefreshToken(
-        token=new_refresh_token_val,
+        token=hash_refresh_token(new_refresh_token_val),
         user_id=user.id,
-        expires_at=datetime.utcnow() + timedelta(days=7)
+        expires_at=now + REFRESH_TOKEN_TTL
     )
     db.add(new_refresh_token)
     
@@ -137,10 +129,7 @@ async def refresh_token(
     await db.commit()
     
     # New Access Token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": user_email}, expires_delta=access_token_expires
-    )
+    access_token = auth.create_access_token(data={"sub": user_email})
     
     return {
         "access_token": access_token, 
@@ -1,25 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from datetime import datetime, timedelta
 from typing import List
-from typing import List
 from uuid import UUID
-import secrets
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from .. import models, schemas, auth
+from .. import cache, models, schemas, auth
 from ..database import get_db
-from ..utils import hash_api_key
-from ..config import settings
+from ..utils import generate_api_key_str, hash_api_key
+from ..limiter import limiter
 
 router = APIRouter(prefix="/keys", tags=["API Keys"])
-limiter = Limiter(key_func=get_remote_address, enabled=not settings.TESTING)
-
-def generate_api_key() -> str:
-    """Generate a secure API key with sk_ prefix"""
-    return f"sk_{secrets.token_urlsafe(32)}"
-
 @router.post("/create", response_model=schemas.APIKeyResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("10/hour")
 async def create_api_key(
@@ -34,7 +24,7 @@ async def create_api_key(
     user, auth_type = current_user_data
     
     # Generate unique API key
-    api_key = generate_api_key()
+    api_key = generate_api_key_str()
     
     # Calculate expiration date
     max_expiration_days = 90
@@ -47,26 +37,23 @@ async def create_api_key(
     expires_in = key_data.expires_in_days if key_data.expires_in_days else max_expiration_days
     expires_at = datetime.utcnow() + timedelta(days=expires_in)
     
-    # Create API key record (store hash)
-    new_key = models.APIKey(
-        key=hash_api_key(api_key),
-        name=key_data.name,
-        user_id=user.id,
-
-        expires_at=expires_at
+    # Create API key record (store hash); RETURNING avoids a refresh round-trip
+    result = await db.execute(
+        insert(models.APIKey)
+        .values(
+            key=hash_api_key(api_key),
+            name=key_data.name,
+            user_id=user.id,
+            expires_at=expires_at
+        )
+        .returning(models.APIKey)
     )
-    
-    db.add(new_key)
-    await db.commit()
-    await db.refresh(new_key)
+    new_key = result.scalar_one()
     
     # Return raw key to user (this is the only time they see it)
-    # We create a response object manually or overlay the raw key onto the model for response
-    # Because refresh(new_key) loads the hashed key back.
-    
-    # We cheat slightly on the response model for this one instance to show the raw key
-    # create a Pydantic object manually
-    return schemas.APIKeyResponse(
+    # The stored row only holds the hash, so build the response manually with the raw key.
+    # Every field comes from the RETURNING row or our own generator, so skip validation.
+    response = schemas.APIKeyResponse.model_construct(
         id=new_key.id,
         key=api_key, # Raw key
         name=new_key.name,
@@ -75,6 +62,9 @@ async def create_api_key(
         expires_at=new_key.expires_at,
         created_at=new_key.created_at
     )
+    await db.commit()
+    
+    return response
 
 @router.get("/list", response_model=List[schemas.APIKeyList])
 @limiter.limit("30/minute")
@@ -88,8 +78,18 @@ async def list_api_keys(
     """
     user, auth_type = current_user_data
     
-    result = await db.execute(select(models.APIKey).filter(models.APIKey.user_id == user.id))
-    keys = result.scalars().all()
+    # Only the listed columns, so the covering index can answer without the heap
+    result = await db.execute(
+        select(
+            models.APIKey.id,
+            models.APIKey.name,
+            models.APIKey.is_active,
+            models.APIKey.expires_at,
+            models.APIKey.created_at,
+            models.APIKey.revoked_at
+        ).filter(models.APIKey.user_id == user.id)
+    )
+    keys = result.all()
     
     return keys
 
@@ -106,12 +106,15 @@ async def revoke_api_key(
     """
     user, auth_type = current_user_data
     
-    # Find the key
+    # Revoke the key and read it back in a single UPDATE ... RETURNING
     result = await db.execute(
-        select(models.APIKey).filter(
+        update(models.APIKey)
+        .where(
             models.APIKey.id == key_id,
             models.APIKey.user_id == user.id
         )
+        .values(is_active=False, revoked_at=datetime.utcnow())
+        .returning(models.APIKey)
     )
     api_key = result.scalar_one_or_none()
     
@@ -121,11 +124,9 @@ async def revoke_api_key(
             detail="API key not found"
         )
     
-    # Revoke the key
-    api_key.is_active = False
-    api_key.revoked_at = datetime.utcnow()
-    
+    key_hash = api_key.key
+    response = schemas.APIKeyRevoke.model_validate(api_key)
     await db.commit()
-    await db.refresh(api_key)
+    await cache.invalidate_api_key(key_hash)
     
-    return api_key
+    return response
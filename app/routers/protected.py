@@ -1,22 +1,19 @@
 from fastapi import APIRouter, Depends, Request
-from .. import auth
+from .. import auth, schemas
 from ..logging_config import logger
 
 router = APIRouter(prefix="/protected", tags=["Protected Routes"])
 
-@router.get("/user-only")
+@router.get("/user-only", response_model=schemas.ProtectedRouteResponse)
 async def user_only_route(
     request: Request,
     current_user_data: tuple = Depends(auth.get_current_user)
 ):
     """
     Example protected route - accessible with both JWT and API key
-    Has explicit rate limiting applied
     """
-    # Verify rate limit manually if strictly needed inside, but usually middleware handles it broadly
-    # or use @limiter.limit("5/minute") decorator if we had the limiter instance imported here.
-    # Since limiter is on app.state, using dependency injection for it is cleaner, but for now
-    # we demonstrate just the auth parts.
+    # Deliberately not rate limited: authenticated reads never touch the
+    # limiter storage (there is no SlowAPI middleware or default limit).
     
     user, auth_type = current_user_data
     logger.info(f"User {user.email} accessed user-only route via {auth_type}")
@@ -29,9 +26,9 @@ async def user_only_route(
         "access_level": "user"
     }
 
-@router.get("/service-only", dependencies=[Depends(auth.require_service_access)])
+@router.get("/service-only", response_model=schemas.ServiceRouteResponse)
 async def service_only_route(
-    current_user_data: tuple = Depends(auth.get_current_user)
+    current_user_data: tuple = Depends(auth.require_service_access)
 ):
     """
     Example service-only route
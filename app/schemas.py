@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 # User Schemas
 class UserCreate(BaseModel):
@@ -19,9 +19,8 @@ class UserResponse(BaseModel):
 
     is_active: bool
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 # Token Schemas
 class Token(BaseModel):
@@ -47,9 +46,8 @@ class APIKeyResponse(BaseModel):
     is_active: bool
     expires_at: Optional[datetime]
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 class APIKeyList(BaseModel):
     id: UUID
@@ -58,9 +56,8 @@ class APIKeyList(BaseModel):
     expires_at: Optional[datetime]
     created_at: datetime
     revoked_at: Optional[datetime]
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 class APIKeyRevoke(BaseModel):
     id: UUID
@@ -69,6 +66,24 @@ class APIKeyRevoke(BaseModel):
     expires_at: Optional[datetime]
     created_at: datetime
     revoked_at: Optional[datetime]
-    
-    class Config:
-        from_attributes = True
\ No newline at end of file
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Protected Route Schemas
+class ProtectedRouteResponse(BaseModel):
+    message: str
+    user_email: str
+    auth_type: str
+    access_level: str
+
+class ServiceRouteResponse(ProtectedRouteResponse):
+    note: str
+
+# Root / Health Schemas
+class RootResponse(BaseModel):
+    message: str
+    version: str
+    endpoints: Dict[str, str]
+
+class HealthResponse(BaseModel):
+    status: str
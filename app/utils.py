@@ -1,8 +1,16 @@
+import base64
 import hashlib
 import secrets
-import re
+import string
 from typing import Optional
 
+# Character classes for the password policy
+_UPPER = frozenset(string.ascii_uppercase)
+_LOWER = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_SPECIAL = frozenset("!@#$%^&*(),.?\":{}|<>_-+=[]\\/;'`~")
+_HAS_UPPER, _HAS_LOWER, _HAS_DIGIT, _HAS_SPECIAL = 1, 2, 4, 8
+
 def validate_password(password: str) -> Optional[str]:
     """
     Validate password against security policy.
@@ -16,22 +24,34 @@ def validate_password(password: str) -> Optional[str]:
     - At least one digit (0-9)
     - At least one special character
     """
+    # Single pass over the password, recording which character classes appear
+    flags = 0
+    for ch in password:
+        if ch in _UPPER:
+            flags |= _HAS_UPPER
+        elif ch in _LOWER:
+            flags |= _HAS_LOWER
+        elif ch in _DIGITS or (not ch.isascii() and ch.isdecimal()):
+            flags |= _HAS_DIGIT
+        elif ch in _SPECIAL:
+            flags |= _HAS_SPECIAL
+    
     errors = []
     
     if len(password) < 8:
         errors.append("Password must be at least 8 characters long")
     
-    if not re.search(r'[A-Z]', password):
+    if not flags & _HAS_UPPER:
         errors.append("Password must contain at least one uppercase letter")
     
-    if not re.search(r'[a-z]', password):
+    if not flags & _HAS_LOWER:
         errors.append("Password must contain at least one lowercase letter")
     
-    if not re.search(r'\d', password):
+    if not flags & _HAS_DIGIT:
         errors.append("Password must contain at least one number (0-9)")
     
-    if not re.search(r'[!@#$%^&*(),.?":{}|<>_\-+=\[\]\\\/;\'`~]', password):
-        errors.append("Password must contain at least one special character (!@#$%^&*(),.?\":{}|<>_-+=[]\\\/;'`~)")
+    if not flags & _HAS_SPECIAL:
+        errors.append("Password must contain at least one special character (!@#$%^&*(),.?\":{}|<>_-+=[]\\\\/;'`~)")
     
     if errors:
         return "; ".join(errors)
@@ -40,12 +60,18 @@ def validate_password(password: str) -> Optional[str]:
 
 def generate_api_key_str() -> str:
     """Generate a secure, random API key string."""
-    return f"sk_{secrets.token_urlsafe(32)}"
+    # 24 bytes encode to exactly 32 base64 chars, so there is no padding to strip
+    return (b"sk_" + base64.urlsafe_b64encode(secrets.token_bytes(24))).decode("ascii")
+
+def generate_refresh_token_str() -> str:
+    """Generate a secure, random refresh token string."""
+    # Bearer credential like API keys: straight from the OS CSPRNG
+    return "rt_" + base64.urlsafe_b64encode(secrets.token_bytes(32)).rstrip(b"=").decode("ascii")
 
-def hash_api_key(api_key: str) -> str:
-    """Hash the API key using SHA256 before storing."""
-    return hashlib.sha256(api_key.encode()).hexdigest()
+def hash_api_key(api_key: str) -> bytes:
+    """Hash the API key using SHA256 before storing (raw 32-byte digest)."""
+    return hashlib.sha256(api_key.encode()).digest()
 
-def verify_api_key(plain_api_key: str, hashed_api_key: str) -> bool:
-    """Verify if the plain API key matches the stored hash."""
-    return hash_api_key(plain_api_key) == hashed_api_key
+def hash_refresh_token(refresh_token: str) -> bytes:
+    """Hash the refresh token using SHA256 before storing (raw 32-byte digest)."""
+    return hashlib.sha256(refresh_token.encode()).digest()
@@ -1,68 +1,105 @@
 import pytest
-import asyncio
 import os
-from typing import AsyncGenerator, Generator
+from typing import AsyncGenerator
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection, AsyncSession, async_sessionmaker
+from sqlalchemy import insert, text
 
 # Set TESTING flag to disable rate limiting
 os.environ["TESTING"] = "true"
+# Minimum bcrypt cost; hashing dominates test time at production cost
+os.environ["BCRYPT_ROUNDS"] = "4"
 
 from app.main import app
 from app.database import get_db, Base
-from app.auth import get_password_hash
+from app.auth import create_access_token
 from app.models import User
 from app.config import settings
+from tests.helpers import cached_hash
 
 # Use the REAL database url from settings/env
 # WARNING: Ideally this should be a separate test database 'auth_db_test'
 TEST_DATABASE_URL = settings.DATABASE_URL
 
+# Each xdist worker holds one long-lived connection; keep the pool small
 engine = create_async_engine(
     TEST_DATABASE_URL,
-    poolclass=NullPool,
+    pool_size=2,
+    max_overflow=0,
 )
 
+# "master" when running without pytest-xdist
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "master")
+
 TestingSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="session")
-def event_loop() -> Generator:
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
+async def connection() -> AsyncGenerator[AsyncConnection, None]:
+    """
+    One connection and one outer transaction per worker for the whole run;
+    connecting per test costs far more than the tests themselves.
+    """
+    conn = await engine.connect()
+    transaction = await conn.begin()
+    
+    # Private schema per worker so parallel runs never contend on unique
+    # rows; being transactional DDL, it disappears with the rollback.
+    schema = f"test_{WORKER_ID}"
+    await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    await conn.execute(text(f'SET LOCAL search_path TO "{schema}"'))
+    await conn.run_sync(Base.metadata.create_all)
+    
+    yield conn
+    
+    await transaction.rollback()
+    await conn.close()
+
+@pytest.fixture(scope="session")
+async def user_token(connection) -> tuple[str, str]:
+    """
+    A user created once per run, returned as (email, access_token), for tests
+    that only need someone logged in. It lives in the outer transaction, so
+    per-test rollbacks leave it in place.
+    """
+    email = f"session-{WORKER_ID}@test.com"
+    await connection.execute(
+        insert(User).values(email=email, hashed_password=cached_hash("SessionUser123!"))
+    )
+    return email, create_access_token(data={"sub": email})
 
 @pytest.fixture(scope="function")
-async def db() -> AsyncGenerator[AsyncSession, None]:
+async def db(connection) -> AsyncGenerator[AsyncSession, None]:
     """
-    Create a fresh transaction for each test and roll it back at the end.
+    Run each test inside a SAVEPOINT and roll it back at the end.
     This ensures tests are isolated and don't modify the actual DB permanently.
     """
-    connection = await engine.connect()
-    transaction = await connection.begin()
+    savepoint = await connection.begin_nested()
     
-    session = AsyncSession(bind=connection)
+    # Commits in the app release a nested savepoint instead of the test's own
+    session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
     
     yield session
     
     await session.close()
-    await transaction.rollback()
-    await connection.close()
+    await savepoint.rollback()
 
 from httpx import AsyncClient, ASGITransport
 
+@pytest.fixture(scope="module")
+async def shared_client() -> AsyncGenerator[AsyncClient, None]:
+    """One AsyncClient per test module; transport setup is not repeated per test."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
 @pytest.fixture(scope="function")
-async def client(db) -> AsyncGenerator[AsyncClient, None]:
+async def client(db, shared_client) -> AsyncGenerator[AsyncClient, None]:
+    # The client is shared, but each test's requests see that test's session
     async def override_get_db():
         yield db
 
     app.dependency_overrides[get_db] = override_get_db
     
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as c:
-        yield c
+    yield shared_client
     
     app.dependency_overrides.clear()
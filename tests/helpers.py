@@ -0,0 +1,23 @@
+import secrets
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth import create_access_token, get_password_hash
+from app.models import User
+
+# Never revealed, so minted users have a valid hash nobody can log in with
+_UNKNOWN_PASSWORD = secrets.token_urlsafe()
+
+@lru_cache(maxsize=16)
+def cached_hash(password: str) -> str:
+    """bcrypt hash of password, computed once per process; any bcrypt hash verifies."""
+    return get_password_hash(password)
+
+async def mint_token(db: AsyncSession, email: str) -> str:
+    """
+    Create a user directly and return an access token for it, skipping the
+    per-test bcrypt work of /auth/signup and /auth/login. Its password is
+    never revealed, so logging in as it fails with 401.
+    """
+    db.add(User(email=email, hashed_password=cached_hash(_UNKNOWN_PASSWORD)))
+    await db.commit()
+    return create_access_token(data={"sub": email})
@@ -1,7 +1,15 @@
 import pytest
+from datetime import timedelta
+from uuid import UUID
 from httpx import AsyncClient
 from sqlalchemy import select
+from app import auth
 from app.models import User, RefreshToken
+from app.config import settings
+from app.utils import hash_refresh_token
+from tests.helpers import mint_token
+
+import jwt
 
 @pytest.mark.asyncio
 async def test_signup(client: AsyncClient, db):
@@ -115,3 +123,148 @@ async def test_refresh_token(client: AsyncClient):
     assert "access_token" in data
     assert "refresh_token" in data
     assert data["refresh_token"] != refresh_token # Should rotate
+
+@pytest.mark.asyncio
+async def test_me_repeated_token(client: AsyncClient):
+    await client.post("/auth/signup", json={
+        "email": "me@example.com", 
+        "password": "MePass123!"
+    })
+    login_res = await client.post("/auth/login", json={
+        "email": "me@example.com", 
+        "password": "MePass123!"
+    })
+    token = login_res.json()["access_token"]
+
+    # Second call is served from the verified-token cache
+    for _ in range(2):
+        response = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["email"] == "me@example.com"
+
+@pytest.mark.asyncio
+async def test_login_rehashes_stale_cost(client: AsyncClient, db, monkeypatch):
+    await client.post("/auth/signup", json={
+        "email": "rehash@example.com", 
+        "password": "RehashPass123!"
+    })
+    result = await db.execute(select(User).filter(User.email == "rehash@example.com"))
+    user = result.scalar_one()
+    # Raise the configured cost so the stored hash is now weaker than required
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", settings.BCRYPT_ROUNDS + 1)
+
+    response = await client.post("/auth/login", json={
+        "email": "rehash@example.com", 
+        "password": "RehashPass123!"
+    })
+    assert response.status_code == 200
+    await db.refresh(user)
+    assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+@pytest.mark.asyncio
+async def test_access_token_claims(client: AsyncClient):
+    await client.post("/auth/signup", json={
+        "email": "claims@example.com", 
+        "password": "ClaimsPass123!"
+    })
+    login_res = await client.post("/auth/login", json={
+        "email": "claims@example.com", 
+        "password": "ClaimsPass123!"
+    })
+    token = login_res.json()["access_token"]
+
+    # Tokens are signed without PyJWT but must verify with it
+    header = jwt.get_unverified_header(token)
+    assert header == {"alg": settings.ALGORITHM, "typ": "JWT"}
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    assert payload["sub"] == "claims@example.com"
+    assert isinstance(payload["exp"], int)
+
+@pytest.mark.asyncio
+async def test_refresh_token_stored_as_digest(client: AsyncClient, db):
+    await client.post("/auth/signup", json={
+        "email": "digest@example.com", 
+        "password": "DigestPass123!"
+    })
+    login_res = await client.post("/auth/login", json={
+        "email": "digest@example.com", 
+        "password": "DigestPass123!"
+    })
+    refresh_token = login_res.json()["refresh_token"]
+
+    # Only the SHA-256 digest is persisted, never the raw token
+    result = await db.execute(select(RefreshToken).filter(RefreshToken.token == hash_refresh_token(refresh_token)))
+    assert result.scalar_one_or_none() is not None
+    result = await db.execute(select(RefreshToken).filter(RefreshToken.token == refresh_token.encode()))
+    assert result.scalar_one_or_none() is None
+
+    # A rotated token cannot be used again
+    response = await client.post(f"/auth/refresh?refresh_token={refresh_token}")
+    assert response.status_code == 200
+    response = await client.post(f"/auth/refresh?refresh_token={refresh_token}")
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_login_unknown_email_runs_bcrypt(client: AsyncClient, monkeypatch):
+    checked = []
+    real_verify = auth.verify_password
+    def spy(plain, hashed):
+        checked.append(hashed)
+        return real_verify(plain, hashed)
+    monkeypatch.setattr(auth, "verify_password", spy)
+
+    response = await client.post("/auth/login", json={
+        "email": "nobody@example.com", 
+        "password": "Whatever123!"
+    })
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect email or password"
+    # Unknown emails still pay for one bcrypt check, against the dummy hash
+    assert checked == [auth._DUMMY_HASH]
+
+@pytest.mark.asyncio
+async def test_cached_token_rejected_after_expiry(client: AsyncClient):
+    await client.post("/auth/signup", json={
+        "email": "expired@example.com", 
+        "password": "ExpiredPass123!"
+    })
+    login_res = await client.post("/auth/login", json={
+        "email": "expired@example.com", 
+        "password": "ExpiredPass123!"
+    })
+    me = await client.get("/auth/me", headers={"Authorization": f"Bearer {login_res.json()['access_token']}"})
+    user_id = UUID(me.json()["id"])
+
+    # A cache entry outliving its token must not authenticate
+    token = auth.create_access_token(data={"sub": "expired@example.com"}, expires_delta=timedelta(seconds=-10))
+    exp = jwt.decode(token, options={"verify_signature": False, "verify_exp": False})["exp"]
+    auth._token_cache[auth._token_cache_key(token)] = (user_id, exp)
+
+    response = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+def test_calibrate_bcrypt_rounds_never_below_configured_cost(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    # An unreachable target still keeps the configured cost
+    assert auth.calibrate_bcrypt_rounds(0, max_rounds=6) == 5
+    # A generous target climbs up to max_rounds
+    assert auth.calibrate_bcrypt_rounds(10_000, max_rounds=6) == 6
+
+def test_set_bcrypt_rounds_updates_dummy_hash(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", settings.BCRYPT_ROUNDS)
+    monkeypatch.setattr(auth, "_DUMMY_HASH", auth._DUMMY_HASH)
+
+    auth.set_bcrypt_rounds(5)
+    assert settings.BCRYPT_ROUNDS == 5
+    # The dummy check must cost the same as verifying a freshly hashed password
+    assert auth._DUMMY_HASH.startswith("$2b$05$")
+    assert auth.get_password_hash("SomePass123!").startswith("$2b$05$")
+
+@pytest.mark.asyncio
+async def test_minted_user_cannot_log_in(client: AsyncClient, db):
+    await mint_token(db, "minted@example.com")
+    response = await client.post("/auth/login", json={
+        "email": "minted@example.com", 
+        "password": "Whatever123!"
+    })
+    assert response.status_code == 401
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime
+from uuid import uuid4
+import fakeredis
+import pytest
+from app import cache
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(cache, "redis_client", client)
+    return client
+
+@pytest.mark.asyncio
+async def test_api_key_round_trip(redis_client):
+    key_hash, user_id = b"\x01" * 32, uuid4()
+    expires_at = time.time() + 60
+
+    data = {
+        "user_id": user_id,
+        "email": "cached@example.com",
+        "user_is_active": True,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, 678901),
+        "is_active": True,
+        "expires_at": expires_at,
+    }
+
+    await cache.set_api_key(key_hash, data)
+
+    assert await cache.get_api_key(key_hash) == data
+
+@pytest.mark.asyncio
+async def test_stale_lookup_cannot_recache_revoked_key(redis_client):
+    key_hash = b"\x02" * 32
+    data = {
+        "user_id": uuid4(),
+        "email": "revoked@example.com",
+        "user_is_active": True,
+        "created_at": datetime(2024, 1, 2),
+        "is_active": True,
+        "expires_at": None,
+    }
+    await cache.set_api_key(key_hash, data)
+
+    await cache.invalidate_api_key(key_hash)
+    # A lookup that read the row before the revoke committed writes back late
+    await cache.set_api_key(key_hash, data)
+
+    assert await cache.get_api_key(key_hash) is None
@@ -1,12 +1,17 @@
 import pytest
+import fakeredis
+from cachetools import TTLCache
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
 from httpx import AsyncClient
+from sqlalchemy import event
+from app import cache
+from app.models import APIKey
+from tests.helpers import mint_token
 
 @pytest.mark.asyncio
-async def test_api_key_access(client: AsyncClient):
-    # Register & Login
-    await client.post("/auth/signup", json={"email": "k@test.com", "password": "TestKey123!"})
-    login_res = await client.post("/auth/login", json={"email": "k@test.com", "password": "TestKey123!"})
-    token = login_res.json()["access_token"]
+async def test_api_key_access(client: AsyncClient, user_token):
+    email, token = user_token
     
     # Create Key (no scopes)
     key_res = await client.post("/keys/create", 
@@ -15,6 +20,7 @@ async def test_api_key_access(client: AsyncClient):
     )
     assert key_res.status_code == 201
     api_key = key_res.json()["key"]
+    assert api_key.startswith("sk_") and len(api_key) == 35
     
     # Access Service Route (requires API Key)
     res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {api_key}"})
@@ -22,11 +28,8 @@ async def test_api_key_access(client: AsyncClient):
     assert res.json()["auth_type"] == "api_key"
 
 @pytest.mark.asyncio
-async def test_jwt_cannot_access_service_route(client: AsyncClient):
-    # Register & Login
-    await client.post("/auth/signup", json={"email": "k2@test.com", "password": "TestKey456!"})
-    login_res = await client.post("/auth/login", json={"email": "k2@test.com", "password": "TestKey456!"})
-    token = login_res.json()["access_token"]
+async def test_jwt_cannot_access_service_route(client: AsyncClient, user_token):
+    email, token = user_token
     
     # Try Accessing Service Only Route with JWT
     res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {token}"})
@@ -34,11 +37,8 @@ async def test_jwt_cannot_access_service_route(client: AsyncClient):
     assert res.status_code == 403
 
 @pytest.mark.asyncio
-async def test_api_key_expiration_policy(client: AsyncClient):
-    # Register & Login
-    await client.post("/auth/signup", json={"email": "k_exp@test.com", "password": "ExpireTest789!"})
-    login_res = await client.post("/auth/login", json={"email": "k_exp@test.com", "password": "ExpireTest789!"})
-    token = login_res.json()["access_token"]
+async def test_api_key_expiration_policy(client: AsyncClient, user_token):
+    email, token = user_token
     
     # 1. Test Default Expiration (should be 90 days)
     res_default = await client.post("/keys/create", 
@@ -62,3 +62,118 @@ async def test_api_key_expiration_policy(client: AsyncClient):
         headers={"Authorization": f"Bearer {token}"}
     )
     assert res_custom.status_code == 201
+
+@pytest.mark.asyncio
+async def test_expired_api_key_rejected(client: AsyncClient, db):
+    token = await mint_token(db, "k_old@test.com")
+    
+    key_res = await client.post("/keys/create", 
+        json={"name": "Old Key"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    api_key = key_res.json()["key"]
+    
+    # Backdate the key past its expiry
+    key_record = await db.get(APIKey, UUID(key_res.json()["id"]))
+    key_record.expires_at = datetime.utcnow() - timedelta(minutes=1)
+    await db.commit()
+    
+    res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {api_key}"})
+    assert res.status_code == 401
+    assert res.json()["detail"] == "API key has expired"
+
+@pytest.mark.asyncio
+async def test_revoked_api_key_rejected(client: AsyncClient, db):
+    token = await mint_token(db, "k_rev@test.com")
+    
+    key_res = await client.post("/keys/create", 
+        json={"name": "Revoked Key"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    api_key = key_res.json()["key"]
+    key_id = key_res.json()["id"]
+    
+    # Use the key first so revocation has to clear the cached lookup
+    res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {api_key}"})
+    assert res.status_code == 200
+    
+    res = await client.delete(f"/keys/revoke/{key_id}", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.json()["is_active"] is False
+    assert res.json()["revoked_at"] is not None
+    
+    res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {api_key}"})
+    assert res.status_code == 401
+    
+    # Unknown keys are reported as not found
+    res = await client.delete(f"/keys/revoke/{uuid4()}", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 404
+
+@pytest.mark.asyncio
+async def test_list_api_keys(client: AsyncClient, db):
+    token = await mint_token(db, "k_list@test.com")
+    
+    for name in ("First Key", "Second Key"):
+        await client.post("/keys/create", 
+            json={"name": name},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    
+    res = await client.get("/keys/list", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    keys = res.json()
+    assert sorted(k["name"] for k in keys) == ["First Key", "Second Key"]
+    # Key values are never listed
+    assert all("key" not in k for k in keys)
+
+@pytest.mark.asyncio
+async def test_revoke_clears_local_api_key_cache(client: AsyncClient, db, monkeypatch):
+    # The per-process layer is off by default; turn it on for this test
+    monkeypatch.setattr(cache, "_local_cache", TTLCache(maxsize=16, ttl=60))
+    token = await mint_token(db, "k_local@test.com")
+    
+    key_res = await client.post("/keys/create", 
+        json={"name": "Local Key"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    api_key = key_res.json()["key"]
+    
+    res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {api_key}"})
+    assert res.status_code == 200
+    assert len(cache._local_cache) == 1
+    
+    res = await client.delete(f"/keys/revoke/{key_res.json()['id']}", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    
+    res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {api_key}"})
+    assert res.status_code == 401
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layer", ["redis", "local"])
+async def test_cached_api_key_skips_database(client: AsyncClient, db, user_token, monkeypatch, layer):
+    if layer == "redis":
+        monkeypatch.setattr(cache, "redis_client", fakeredis.FakeAsyncRedis())
+    else:
+        monkeypatch.setattr(cache, "_local_cache", TTLCache(maxsize=16, ttl=60))
+    email, token = user_token
+    
+    key_res = await client.post("/keys/create", 
+        json={"name": "Cached Key"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    api_key = key_res.json()["key"]
+    
+    statements = []
+    def count(conn, cursor, statement, *args):
+        if statement.startswith("SELECT"):
+            statements.append(statement)
+    event.listen(db.bind.sync_engine, "before_cursor_execute", count)
+    try:
+        # First use loads key and owner in one query; the second is served from the cache
+        for expected in (1, 1):
+            res = await client.get("/protected/service-only", headers={"Authorization": f"Bearer {api_key}"})
+            assert res.status_code == 200
+            assert res.json()["user_email"] == email
+            assert len(statements) == expected
+    finally:
+        event.remove(db.bind.sync_engine, "before_cursor_execute", count)
@@ -0,0 +1,89 @@
+import time
+import fakeredis
+import pytest
+from limits.storage import storage_from_string
+from app import limiter as limiter_module
+from app.limiter import CoalescedRedisStorage
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        limiter_module.redis.Redis, "from_url",
+        lambda url, **options: fakeredis.FakeRedis(server=server)
+    )
+    return server
+
+def make_storage() -> CoalescedRedisStorage:
+    # Long interval so the background thread stays idle; tests flush by hand
+    return CoalescedRedisStorage("coalesced+redis://localhost:6379", flush_interval=3600)
+
+def test_counts_converge_across_storages(server):
+    a, b = make_storage(), make_storage()
+    for _ in range(3):
+        a.incr("ip", 60)
+    for _ in range(2):
+        b.incr("ip", 60)
+    a._flush()
+    b._flush()
+
+    assert int(fakeredis.FakeRedis(server=server).get("LIMITS:ip")) == 5
+    assert b.get("ip") == 5
+    # A storage seeing the key for the first time starts from the shared count
+    assert make_storage().incr("ip", 60) == 6
+
+def test_window_rollover(server):
+    storage = make_storage()
+    for _ in range(3):
+        storage.incr("ip", 1)
+    storage._flush()
+    assert storage.get("ip") == 3
+
+    time.sleep(1.1)
+    assert storage.incr("ip", 1) == 1
+    storage._flush()
+    assert storage.get("ip") == 1
+
+def test_deltas_kept_while_redis_is_down(server):
+    storage = make_storage()
+    storage.incr("ip", 60)
+    storage.incr("ip", 60)
+
+    server.connected = False
+    storage._flush()
+    assert storage.get("ip") == 2
+
+    server.connected = True
+    storage._flush()
+    assert int(fakeredis.FakeRedis(server=server).get("LIMITS:ip")) == 2
+
+def test_clear_and_reset(server):
+    client = fakeredis.FakeRedis(server=server)
+    client.set("other", 1)
+    storage = make_storage()
+    for key in ("a", "b"):
+        storage.incr(key, 60)
+    storage._flush()
+
+    storage.clear("a")
+    assert storage.get("a") == 0
+    assert client.get("LIMITS:a") is None
+
+    assert storage.reset() == 1
+    assert storage.get("b") == 0
+    assert client.get("LIMITS:b") is None
+    # Keys outside the limiter namespace are untouched
+    assert client.get("other") is not None
+
+    # Losing Redis only affects the shared side
+    server.connected = False
+    storage.clear("b")
+    assert storage.reset() is None
+
+@pytest.mark.parametrize("uri", [
+    "coalesced+redis://localhost:6379",
+    "coalesced+rediss://localhost:6380",
+    "coalesced+unix:///tmp/redis.sock",
+])
+def test_storage_schemes(uri):
+    assert isinstance(storage_from_string(uri, flush_interval=3600), CoalescedRedisStorage)